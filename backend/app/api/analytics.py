@@ -1,7 +1,9 @@
 from datetime import datetime
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 from app.models.database import db_manager
-from app.models.analytics import analytics
+from app.models import analytics
 from app.utils.config import get_logger
 
 router = APIRouter()
@@ -16,29 +18,46 @@ async def get_analytics(user_id: str = "default_user"):
         if not progress:
             raise HTTPException(status_code=404, detail="No progress data found")
 
-        learning_velocity = analytics.calculate_learning_velocity(progress)
-        certification_readiness = analytics.predict_certification_readiness(progress)
-        recommendations = analytics.generate_personalized_recommendations(progress)
+        summary = analytics.summarize(progress)
+        report = analytics.build_report(user_id, summary)
 
         return {
-            "learning_velocity": learning_velocity,
-            "certification_readiness": certification_readiness,
-            "recommendations": recommendations,
-            "summary": {
-                "total_xp": progress.totalXP,
-                "completion_rate": len(progress.completedTasks)
-                / max(1, progress.currentWeek * 5),
-                "struggle_rate": len(progress.struggledTasks)
-                / max(1, len(progress.completedTasks)),
-                "portfolio_count": len(progress.portfolioItems),
-            },
+            **report,
+            "summary": analytics.summary_metrics(
+                summary.total_xp,
+                summary.completed_n,
+                summary.struggled_n,
+                summary.portfolio_n,
+                summary.current_week,
+            ),
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting analytics: {e}")
+        logger.error("Error getting analytics: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve analytics")
 
 
+@router.get("/analytics/summary")
+async def get_analytics_summary(user_id: str = "default_user"):
+    """Get headline progress numbers without the full analytics report"""
+    try:
+        counts = await db_manager.load_summary(user_id)
+        if not counts:
+            raise HTTPException(status_code=404, detail="No progress data found")
+
+        return analytics.summary_metrics(**counts)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error getting analytics summary: %s", e)
+        raise HTTPException(
+            status_code=500, detail="Failed to retrieve analytics summary"
+        )
+
+
 @router.get("/spaced-repetition")
 async def get_spaced_repetition(user_id: str = "default_user"):
     """Get items due for spaced repetition review"""
@@ -46,7 +65,7 @@ async def get_spaced_repetition(user_id: str = "default_user"):
         items = await db_manager.get_spaced_repetition_items(user_id)
         return {"items": items, "count": len(items)}
     except Exception as e:
-        logger.error(f"Error getting spaced repetition: {e}")
+        logger.error("Error getting spaced repetition: %s", e)
         raise HTTPException(
             status_code=500, detail="Failed to retrieve spaced repetition items"
         )
@@ -63,11 +82,16 @@ async def create_backup(user_id: str = "default_user"):
         backup_data = {
             "backup_date": datetime.now().isoformat(),
             "user_id": user_id,
-            "progress": progress.dict(),
+            "progress": progress.model_dump(),
             "version": "1.0.0",
         }
 
-        return backup_data
+        # Serialize once with orjson instead of jsonable_encoder + json.dumps
+        return Response(
+            content=orjson.dumps(backup_data), media_type="application/json"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error creating backup: {e}")
+        logger.error("Error creating backup: %s", e)
         raise HTTPException(status_code=500, detail="Failed to create backup")
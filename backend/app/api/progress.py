@@ -1,4 +1,5 @@
 from datetime import datetime
+from types import MappingProxyType
 from fastapi import APIRouter, HTTPException
 from app.models.progress import ProgressData, TaskCompletion, DailyLog
 from app.models.database import db_manager
@@ -8,6 +9,13 @@ from app.utils.config import get_logger
 router = APIRouter()
 logger = get_logger(__name__)  # Module-specific logger
 
+# Per-category task rewards, built once at import
+XP_MULTIPLIER_MAP = MappingProxyType({"capstone": 1.5, "project": 1.2})
+CERT_PROGRESS_MAP = MappingProxyType(
+    {"ai": 5, "production": 3, "project": 2, "capstone": 10}
+)
+PORTFOLIO_CATEGORIES = frozenset({"project", "capstone"})
+
 
 @router.get("/progress")
 async def get_progress(user_id: str = "default_user"):
@@ -20,7 +28,7 @@ async def get_progress(user_id: str = "default_user"):
 
         return progress
     except Exception as e:
-        logger.error(f"Error getting progress: {e}")
+        logger.error("Error getting progress: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve progress")
 
 
@@ -36,8 +44,10 @@ async def save_progress(progress: ProgressData, user_id: str = "default_user"):
         else:
             raise HTTPException(status_code=500, detail="Failed to save progress")
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error saving progress: {e}")
+        logger.error("Error saving progress: %s", e)
         raise HTTPException(status_code=500, detail="Failed to save progress")
 
 
@@ -45,59 +55,40 @@ async def save_progress(progress: ProgressData, user_id: str = "default_user"):
 async def complete_task(completion: TaskCompletion, user_id: str = "default_user"):
     """Mark a task as completed and update progress"""
     try:
-        # Load current progress
-        progress = await db_manager.load_progress(user_id) or ProgressData()
-
-        # Add task to completed list if not already there
-        if completion.taskId not in progress.completedTasks:
-            progress.completedTasks.append(completion.taskId)
-
-            # Update XP
-            multiplier = (
-                1.5
-                if completion.category == "capstone"
-                else 1.2 if completion.category == "project" else 1.0
-            )
-            earned_xp = int(completion.points * multiplier)
-            progress.totalXP += earned_xp
-            progress.dailyXP += earned_xp
-
-            # Update certification progress
-            cert_progress_map = {"ai": 5, "production": 3, "project": 2, "capstone": 10}
-            cert_increase = cert_progress_map.get(completion.category, 1)
-            progress.certificationProgress["Google Cloud AI"] = min(
-                100, progress.certificationProgress["Google Cloud AI"] + cert_increase
-            )
-
-            # Add to portfolio if applicable
-            if completion.category in ["project", "capstone"]:
-                portfolio_item = {
-                    "id": completion.taskId,
-                    "name": f"Task: {completion.taskId}",
-                    "completedDate": datetime.now().isoformat(),
-                    "type": completion.category,
-                    "xp": earned_xp,
-                }
-                progress.portfolioItems.append(portfolio_item)
-
-            # Save notes if provided
-            if completion.notes:
-                progress.notes[completion.taskId] = completion.notes
-
-        # Save updated progress
-        await db_manager.save_progress(user_id, progress)
+        multiplier = XP_MULTIPLIER_MAP.get(completion.category, 1.0)
+        earned_xp = int(completion.points * multiplier)
+        cert_increase = CERT_PROGRESS_MAP.get(completion.category, 1)
+
+        # Add to portfolio if applicable
+        portfolio_item = None
+        if completion.category in PORTFOLIO_CATEGORIES:
+            portfolio_item = {
+                "id": completion.taskId,
+                "name": f"Task: {completion.taskId}",
+                "completedDate": datetime.now().isoformat(),
+                "type": completion.category,
+                "xp": earned_xp,
+            }
+
+        # Single upsert; a task that is already completed earns nothing
+        result = await db_manager.apply_task_completion(
+            user_id, completion, earned_xp, cert_increase, portfolio_item
+        )
+        if result is None:
+            raise HTTPException(status_code=500, detail="Failed to complete task")
+        xp_earned, total_xp = result
 
         return {
             "success": True,
             "message": "Task completed successfully",
-            "xp_earned": (
-                earned_xp if completion.taskId not in progress.completedTasks else 0
-            ),
-            "total_xp": progress.totalXP,
+            "xp_earned": xp_earned,
+            "total_xp": total_xp,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error completing task: {e}")
+        logger.error("Error completing task: %s", e)
         raise HTTPException(status_code=500, detail="Failed to complete task")
 
 
@@ -110,6 +101,8 @@ async def save_daily_log(log: DailyLog, user_id: str = "default_user"):
             return {"success": True, "message": "Daily log saved"}
         else:
             raise HTTPException(status_code=500, detail="Failed to save daily log")
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error saving daily log: {e}")
+        logger.error("Error saving daily log: %s", e)
         raise HTTPException(status_code=500, detail="Failed to save daily log")
@@ -2,11 +2,14 @@
 # FastAPI backend optimized for Railway.app deployment
 
 import asyncio
+import shutil
+import time
 from datetime import datetime
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.utils.config import get_config
 from app.utils.tasks import cleanup_old_data
@@ -17,6 +20,10 @@ from app.models.database import db_manager
 config = get_config()
 logger = config.logger  # App-level logger
 
+# Health probes hit /health every few seconds; reuse the result for a while
+HEALTH_CACHE_SECONDS = 10
+_health_cache = {"ts": 0.0, "value": None}
+
 
 # FastAPI app with lifespan management
 @asynccontextmanager
@@ -28,11 +35,16 @@ async def lifespan(
     await db_manager.initialize()
 
     # Start background tasks
-    asyncio.create_task(cleanup_old_data())
+    cleanup_task = asyncio.create_task(cleanup_old_data())
 
     yield
 
     # Cleanup
+    cleanup_task.cancel()
+    try:
+        await cleanup_task
+    except asyncio.CancelledError:
+        pass
     await db_manager.close()
     logger.info("Shutting down API Progress Tracker API...")
 
@@ -43,8 +55,12 @@ app = FastAPI(
     version="1.0.0",
     debug=config.api.debug,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Compress larger responses (progress and analytics payloads)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -79,26 +95,38 @@ async def get_frontend_config():
 @app.get("/health")
 async def health_check():
     """Comprehensive health check"""
+    now = time.monotonic()
+    if (
+        _health_cache["value"] is not None
+        and now - _health_cache["ts"] < HEALTH_CACHE_SECONDS
+    ):
+        return _health_cache["value"]
+
     try:
         # Test database connection
-        db_status = "connected" if db_manager.pool else "file_based"
+        if db_manager.pool:
+            async with db_manager.pool.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+            db_status = "connected"
+        else:
+            db_status = "file_based"
 
         # Check disk space (for file-based storage)
-        import shutil
-
         disk_usage = shutil.disk_usage(".")
         free_space_gb = disk_usage.free / (1024**3)
 
-        return {
+        _health_cache["value"] = {
             "status": "healthy",
             "database": db_status,
             "free_space_gb": round(free_space_gb, 2),
             "timestamp": datetime.now().isoformat(),
             "version": "1.0.0",
         }
+        _health_cache["ts"] = now
+        return _health_cache["value"]
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        logger.error("Health check failed: %s", e)
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "unhealthy",
@@ -116,4 +144,5 @@ if __name__ == "__main__":
         host=config.api.host,
         port=config.api.port,
         reload=config.api.debug,
+        workers=config.api.workers,
     )
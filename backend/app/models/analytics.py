@@ -1,86 +1,148 @@
-from typing import List, Dict, Any
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 from .progress import ProgressData
 
+# Reports keyed by (user_id, lastUpdated); lastUpdated is bumped on every save
+REPORT_CACHE_SIZE = 1024
+_report_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+
+@dataclass(slots=True)
+class ProgressSummary:
+    """Scalars derived from ProgressData in a single pass."""
+
+    total_xp: int
+    streak: int
+    current_week: int
+    completed_n: int
+    struggled_n: int
+    portfolio_n: int
+    cert_items: Tuple[Tuple[str, int], ...]
+    max_cert: int
+    days_active: float
+    last_updated: Optional[str]
+
 
 # Enhanced Progress Analytics
-class ProgressAnalytics:
-    @staticmethod
-    def calculate_learning_velocity(progress: ProgressData) -> Dict[str, float]:
-        """Calculate learning velocity metrics"""
-        days_active = max(1, len(progress.completedTasks) / 3)  # Rough estimate
-
-        return {
-            "xp_per_day": progress.totalXP / days_active,
-            "tasks_per_day": len(progress.completedTasks) / days_active,
-            "efficiency_score": progress.totalXP
-            / max(1, len(progress.struggledTasks) + 1),
-            "consistency_score": (
-                progress.streak / days_active if days_active > 0 else 0
+def summarize(progress: ProgressData) -> ProgressSummary:
+    """Collect the counts and maxima every analytics metric needs"""
+    completed_n = len(progress.completedTasks)
+
+    return ProgressSummary(
+        total_xp=progress.totalXP,
+        streak=progress.streak,
+        current_week=progress.currentWeek,
+        completed_n=completed_n,
+        struggled_n=len(progress.struggledTasks),
+        portfolio_n=len(progress.portfolioItems),
+        cert_items=tuple(progress.certificationProgress.items()),
+        max_cert=max(progress.certificationProgress.values(), default=0),
+        days_active=max(1, completed_n / 3),  # Rough estimate
+        last_updated=progress.lastUpdated,
+    )
+
+
+def calculate_learning_velocity(summary: ProgressSummary) -> Dict[str, float]:
+    """Calculate learning velocity metrics"""
+    days_active = summary.days_active
+
+    return {
+        "xp_per_day": summary.total_xp / days_active,
+        "tasks_per_day": summary.completed_n / days_active,
+        "efficiency_score": summary.total_xp / max(1, summary.struggled_n + 1),
+        "consistency_score": (summary.streak / days_active if days_active > 0 else 0),
+    }
+
+
+def predict_certification_readiness(
+    summary: ProgressSummary,
+) -> Dict[str, Dict[str, Any]]:
+    """Predict certification readiness based on progress"""
+    readiness = {}
+
+    for cert, progress_pct in summary.cert_items:
+        estimated_days = max(1, (100 - progress_pct) / 2)  # 2% per day estimate
+
+        readiness[cert] = {
+            "current_progress": progress_pct,
+            "estimated_days_to_ready": estimated_days,
+            "confidence_level": (
+                "high"
+                if progress_pct > 70
+                else "medium" if progress_pct > 40 else "low"
+            ),
+            "recommended_focus": (
+                "practice_exams" if progress_pct > 60 else "foundation_building"
             ),
         }
 
-    @staticmethod
-    def predict_certification_readiness(
-        progress: ProgressData,
-    ) -> Dict[str, Dict[str, Any]]:
-        """Predict certification readiness based on progress"""
-        readiness = {}
-
-        for cert, progress_pct in progress.certificationProgress.items():
-            estimated_days = max(1, (100 - progress_pct) / 2)  # 2% per day estimate
-
-            readiness[cert] = {
-                "current_progress": progress_pct,
-                "estimated_days_to_ready": estimated_days,
-                "confidence_level": (
-                    "high"
-                    if progress_pct > 70
-                    else "medium" if progress_pct > 40 else "low"
-                ),
-                "recommended_focus": (
-                    "practice_exams" if progress_pct > 60 else "foundation_building"
-                ),
-            }
-
-        return readiness
-
-    @staticmethod
-    def generate_personalized_recommendations(progress: ProgressData) -> List[str]:
-        """Generate AI-powered learning recommendations"""
-        recommendations = []
-
-        # Difficulty adjustment recommendations
-        struggle_rate = len(progress.struggledTasks) / max(
-            1, len(progress.completedTasks)
+    return readiness
+
+
+def generate_personalized_recommendations(summary: ProgressSummary) -> List[str]:
+    """Generate AI-powered learning recommendations"""
+    recommendations = []
+
+    # Difficulty adjustment recommendations
+    struggle_rate = summary.struggled_n / max(1, summary.completed_n)
+    if struggle_rate > 0.3:
+        recommendations.append(
+            "Consider reviewing fundamentals - high struggle rate detected"
         )
-        if struggle_rate > 0.3:
-            recommendations.append(
-                "Consider reviewing fundamentals - high struggle rate detected"
-            )
-        elif struggle_rate < 0.1:
-            recommendations.append(
-                "You're doing great! Consider taking on more challenging projects"
-            )
-
-        # Progress velocity recommendations
-        if progress.totalXP < progress.currentWeek * 1000:
-            recommendations.append(
-                "Increase daily study time to meet weekly XP targets"
-            )
-
-        # Certification recommendations
-        max_cert_progress = max(progress.certificationProgress.values())
-        if max_cert_progress > 80:
-            recommendations.append(
-                "You're close to certification! Schedule your exam soon"
-            )
-
-        # Portfolio recommendations
-        if len(progress.portfolioItems) < progress.currentWeek:
-            recommendations.append("Focus on completing more portfolio projects")
-
-        return recommendations[:3]  # Limit to top 3 recommendations
-
-
-# Create singleton instance
-analytics = ProgressAnalytics()
+    elif struggle_rate < 0.1:
+        recommendations.append(
+            "You're doing great! Consider taking on more challenging projects"
+        )
+
+    # Progress velocity recommendations
+    if summary.total_xp < summary.current_week * 1000:
+        recommendations.append("Increase daily study time to meet weekly XP targets")
+
+    # Certification recommendations
+    if summary.max_cert > 80:
+        recommendations.append("You're close to certification! Schedule your exam soon")
+
+    # Portfolio recommendations
+    if summary.portfolio_n < summary.current_week:
+        recommendations.append("Focus on completing more portfolio projects")
+
+    return recommendations[:3]  # Limit to top 3 recommendations
+
+
+def summary_metrics(
+    total_xp: int,
+    completed_n: int,
+    struggled_n: int,
+    portfolio_n: int,
+    current_week: int,
+) -> Dict[str, Any]:
+    """Headline completion numbers shown alongside the analytics report"""
+    return {
+        "total_xp": total_xp,
+        "completion_rate": completed_n / max(1, current_week * 5),
+        "struggle_rate": struggled_n / max(1, completed_n),
+        "portfolio_count": portfolio_n,
+    }
+
+
+def build_report(user_id: str, summary: ProgressSummary) -> Dict[str, Any]:
+    """Compute velocity, readiness and recommendations, memoized per version"""
+    key = (user_id, summary.last_updated)
+    if summary.last_updated is not None and key in _report_cache:
+        _report_cache.move_to_end(key)
+        return _report_cache[key]
+
+    report = {
+        "learning_velocity": calculate_learning_velocity(summary),
+        "certification_readiness": predict_certification_readiness(summary),
+        "recommendations": generate_personalized_recommendations(summary),
+    }
+
+    # Without a version stamp there is nothing safe to key on
+    if summary.last_updated is not None:
+        _report_cache[key] = report
+        if len(_report_cache) > REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+
+    return report
@@ -1,178 +1,508 @@
 import os
-import json
-from typing import List, Optional
+import asyncio
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
 import asyncpg
-from app.utils.config import get_logger
-from .progress import ProgressData, DailyLog, SpacedRepetitionItem
+import orjson
+from app.utils.config import get_config, get_logger
+from .progress import ProgressData, TaskCompletion, DailyLog, SpacedRepetitionItem
 
 logger = get_logger(__name__)  # Module-specific logger
 
+# Hot-path statements; asyncpg's per-connection statement cache prepares
+# each of them once per connection
+SAVE_PROGRESS_SQL = """
+    INSERT INTO user_progress (user_id, data, updated_at)
+    VALUES ($1, $2, NOW())
+    ON CONFLICT (user_id) DO UPDATE SET
+    data = $2, updated_at = NOW()
+"""
+
+LOAD_PROGRESS_SQL = """
+    SELECT data FROM user_progress WHERE user_id = $1
+"""
+
+APPLY_TASK_COMPLETION_SQL = """
+    INSERT INTO user_progress AS p (user_id, data, updated_at)
+    VALUES ($1, $2, NOW())
+    ON CONFLICT (user_id) DO UPDATE SET
+    data = p.data || jsonb_build_object(
+        'completedTasks',
+        COALESCE(p.data->'completedTasks', '[]') || to_jsonb($3::text),
+        'totalXP', COALESCE((p.data->>'totalXP')::int, 0) + $4::int,
+        'dailyXP', COALESCE((p.data->>'dailyXP')::int, 0) + $4::int,
+        'certificationProgress',
+        COALESCE(p.data->'certificationProgress', '{}')
+        || jsonb_build_object('Google Cloud AI', LEAST(100,
+            COALESCE((p.data->'certificationProgress'->>'Google Cloud AI')::int, 0)
+            + $5::int)),
+        'portfolioItems',
+        COALESCE(p.data->'portfolioItems', '[]') || $6::jsonb,
+        'notes', COALESCE(p.data->'notes', '{}') || $7::jsonb,
+        'lastUpdated', $8::text
+    ),
+    updated_at = NOW()
+    WHERE NOT COALESCE(p.data->'completedTasks', '[]') ? $3::text
+    RETURNING (p.data->>'totalXP')::int
+"""
+
+LOAD_SUMMARY_SQL = """
+    SELECT total_xp, completed_count AS completed_n, struggled_count AS struggled_n,
+    portfolio_count AS portfolio_n, current_week
+    FROM user_progress WHERE user_id = $1
+"""
+
+LOAD_TOTAL_XP_SQL = """
+    SELECT (data->>'totalXP')::int FROM user_progress
+    WHERE user_id = $1
+"""
+
+SAVE_DAILY_LOG_SQL = """
+    INSERT INTO daily_logs (user_id, date, data)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (user_id, date) DO UPDATE SET
+    data = $3
+"""
+
+# Advisory lock key serializing schema setup across workers starting together
+SCHEMA_LOCK_ID = 8675310
+
+# Full progress saves for the same user within this window share one upsert
+WRITE_COALESCE_SECONDS = 0.1
+
+# File fallback: completions are appended to a per-user log and folded into
+# the JSON snapshot once the log reaches this many entries
+LOG_COMPACTION_LINES = 100
+
+
+async def _init_connection(conn):
+    """Decode/encode JSONB with orjson so rows come back as parsed dicts"""
+    # Binary JSONB is a version byte (1) followed by the JSON text
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=lambda value: b"\x01" + orjson.dumps(value),
+        decoder=lambda data: orjson.loads(data[1:]),
+        schema="pg_catalog",
+        format="binary",
+    )
+
+
+def _apply_completion(
+    progress: ProgressData,
+    completion: TaskCompletion,
+    earned_xp: int,
+    cert_increase: int,
+    portfolio_item: Optional[Dict[str, Any]],
+    timestamp: str,
+) -> bool:
+    """Apply a task completion to progress in memory; False if already done"""
+    if not progress.add_completed(completion.taskId):
+        return False
+
+    progress.totalXP += earned_xp
+    progress.dailyXP += earned_xp
+    progress.certificationProgress["Google Cloud AI"] = min(
+        100, progress.certificationProgress.get("Google Cloud AI", 0) + cert_increase
+    )
+    if portfolio_item:
+        progress.portfolioItems.append(portfolio_item)
+    if completion.notes:
+        progress.notes[completion.taskId] = completion.notes
+    progress.lastUpdated = timestamp
+    return True
+
 
 # Database Manager
 class DatabaseManager:
     def __init__(self):
         self.pool = None
         self.database_url = os.getenv("DATABASE_URL", "sqlite:///progress.db")
+        # Write-behind state: latest unsaved snapshot and its flush per user
+        self._pending: Dict[str, ProgressData] = {}
+        self._write_queue: Dict[str, asyncio.Task] = {}
 
     async def initialize(self):
         """Initialize database connection pool"""
         try:
             if self.database_url.startswith("postgresql"):
+                # Keep pool_size connections warm, burst up to max_overflow more
+                db_config = get_config().database
                 self.pool = await asyncpg.create_pool(
-                    self.database_url, min_size=1, max_size=10, command_timeout=60
+                    self.database_url,
+                    min_size=db_config.pool_size,
+                    max_size=db_config.pool_size + db_config.max_overflow,
+                    max_inactive_connection_lifetime=300,
+                    command_timeout=10,
+                    server_settings={"statement_timeout": "10000"},
+                    init=_init_connection,
                 )
-                await self.create_tables()
                 logger.info("Connected to PostgreSQL database")
             else:
                 # Fallback to file-based storage for development
                 logger.info("Using file-based storage (development mode)")
 
         except Exception as e:
-            logger.error(f"Database initialization failed: {e}")
+            logger.error("Database initialization failed: %s", e)
             # Continue with file-based storage as fallback
 
-    async def create_tables(self):
+        if self.pool:
+            try:
+                # Dedicated connection: DDL may outlast the pool's query timeouts
+                conn = await asyncpg.connect(self.database_url)
+                try:
+                    await conn.execute("SELECT pg_advisory_lock($1)", SCHEMA_LOCK_ID)
+                    try:
+                        await self.create_tables(conn)
+                    finally:
+                        await conn.execute(
+                            "SELECT pg_advisory_unlock($1)", SCHEMA_LOCK_ID
+                        )
+                finally:
+                    await conn.close()
+            except Exception as e:
+                # The pool itself works, so keep serving from Postgres
+                logger.error("Database schema setup failed: %s", e)
+
+    async def create_tables(self, conn):
         """Create necessary database tables"""
-        if not self.pool:
-            return
-
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS user_progress (
-                    id SERIAL PRIMARY KEY,
-                    user_id VARCHAR(100) DEFAULT 'default_user',
-                    data JSONB NOT NULL,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                )
+        await conn.execute(
             """
+            CREATE TABLE IF NOT EXISTS user_progress (
+                id SERIAL PRIMARY KEY,
+                user_id VARCHAR(100) DEFAULT 'default_user' UNIQUE,
+                data JSONB NOT NULL,
+                created_at TIMESTAMP DEFAULT NOW(),
+                updated_at TIMESTAMP DEFAULT NOW()
             )
+        """
+        )
 
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS daily_logs (
-                    id SERIAL PRIMARY KEY,
-                    user_id VARCHAR(100) DEFAULT 'default_user',
-                    date DATE NOT NULL,
-                    data JSONB NOT NULL,
-                    created_at TIMESTAMP DEFAULT NOW()
-                )
+        # Scalars kept in sync by Postgres so summaries skip the JSONB payload
+        await conn.execute(
             """
-            )
+            ALTER TABLE user_progress
+            ADD COLUMN IF NOT EXISTS total_xp INT
+                GENERATED ALWAYS AS ((data->>'totalXP')::int) STORED,
+            ADD COLUMN IF NOT EXISTS completed_count INT
+                GENERATED ALWAYS AS (
+                    COALESCE(jsonb_array_length(data->'completedTasks'), 0)
+                ) STORED,
+            ADD COLUMN IF NOT EXISTS struggled_count INT
+                GENERATED ALWAYS AS (
+                    COALESCE(jsonb_array_length(data->'struggledTasks'), 0)
+                ) STORED,
+            ADD COLUMN IF NOT EXISTS portfolio_count INT
+                GENERATED ALWAYS AS (
+                    COALESCE(jsonb_array_length(data->'portfolioItems'), 0)
+                ) STORED,
+            ADD COLUMN IF NOT EXISTS current_week INT
+                GENERATED ALWAYS AS ((data->>'currentWeek')::int) STORED
+        """
+        )
 
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS spaced_repetition (
-                    id SERIAL PRIMARY KEY,
-                    user_id VARCHAR(100) DEFAULT 'default_user',
-                    task_id VARCHAR(100) NOT NULL,
-                    data JSONB NOT NULL,
-                    next_review TIMESTAMP NOT NULL,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                )
+        await conn.execute(
             """
+            CREATE TABLE IF NOT EXISTS daily_logs (
+                id SERIAL PRIMARY KEY,
+                user_id VARCHAR(100) DEFAULT 'default_user',
+                date DATE NOT NULL,
+                data JSONB NOT NULL,
+                created_at TIMESTAMP DEFAULT NOW(),
+                UNIQUE (user_id, date)
             )
+        """
+        )
 
-            # Create indexes for better performance
-            await conn.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_user_progress_user_id ON user_progress(user_id)
+        # Tables created before the UNIQUE constraints existed need them
+        # added in place, otherwise the ON CONFLICT upserts fail
+        await conn.execute(
             """
-            )
-            await conn.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_daily_logs_user_date ON daily_logs(user_id, date)
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_constraint
+                    WHERE conname = 'user_progress_user_id_key'
+                ) THEN
+                    DELETE FROM user_progress a USING user_progress b
+                    WHERE a.user_id = b.user_id
+                    AND (a.updated_at, a.id) < (b.updated_at, b.id);
+                    ALTER TABLE user_progress
+                    ADD CONSTRAINT user_progress_user_id_key UNIQUE (user_id);
+                END IF;
+
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_constraint
+                    WHERE conname = 'daily_logs_user_id_date_key'
+                ) THEN
+                    DELETE FROM daily_logs a USING daily_logs b
+                    WHERE a.user_id = b.user_id AND a.date = b.date
+                    AND a.id < b.id;
+                    ALTER TABLE daily_logs
+                    ADD CONSTRAINT daily_logs_user_id_date_key UNIQUE (user_id, date);
+                END IF;
+            END
+            $$
+        """
+        )
+
+        await conn.execute(
             """
+            CREATE TABLE IF NOT EXISTS spaced_repetition (
+                id SERIAL PRIMARY KEY,
+                user_id VARCHAR(100) DEFAULT 'default_user',
+                task_id VARCHAR(100) NOT NULL,
+                data JSONB NOT NULL,
+                next_review TIMESTAMP NOT NULL,
+                created_at TIMESTAMP DEFAULT NOW(),
+                updated_at TIMESTAMP DEFAULT NOW()
             )
-            await conn.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_spaced_repetition_review ON spaced_repetition(user_id, next_review)
+        """
+        )
+
+        # Create indexes for better performance (the UNIQUE constraints
+        # already index user_progress(user_id) and daily_logs(user_id, date))
+        await conn.execute(
             """
-            )
+            DROP INDEX IF EXISTS idx_user_progress_user_id, idx_daily_logs_user_date
+        """
+        )
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_spaced_repetition_review ON spaced_repetition(user_id, next_review)
+        """
+        )
+        # Cleanup deletes by next_review across all users
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_spaced_repetition_next_review ON spaced_repetition(next_review)
+        """
+        )
 
     async def save_progress(self, user_id: str, progress_data: ProgressData) -> bool:
         """Save user progress to database"""
         try:
             if self.pool:
-                async with self.pool.acquire() as conn:
-                    await conn.execute(
-                        """
-                        INSERT INTO user_progress (user_id, data, updated_at)
-                        VALUES ($1, $2, NOW())
-                        ON CONFLICT (user_id) DO UPDATE SET
-                        data = $2, updated_at = NOW()
-                    """,
-                        user_id,
-                        json.dumps(progress_data.dict()),
-                    )
-                    return True
+                # Coalesce rapid saves; every caller waits for the shared flush
+                self._pending[user_id] = progress_data
+                flush = self._write_queue.get(user_id)
+                if flush is None:
+                    flush = asyncio.create_task(self._flush_progress(user_id))
+                    self._write_queue[user_id] = flush
+                return await asyncio.shield(flush)
             else:
                 # File-based fallback
                 os.makedirs("data", exist_ok=True)
-                with open(f"data/progress_{user_id}.json", "w") as f:
-                    json.dump(progress_data.dict(), f, indent=2)
+                with open(f"data/progress_{user_id}.json", "wb") as f:
+                    f.write(
+                        orjson.dumps(
+                            progress_data.model_dump(), option=orjson.OPT_INDENT_2
+                        )
+                    )
+                # The full snapshot supersedes any logged completions
+                log_path = f"data/progress_{user_id}.log"
+                if os.path.exists(log_path):
+                    os.remove(log_path)
                 return True
 
         except Exception as e:
-            logger.error(f"Failed to save progress: {e}")
+            logger.error("Failed to save progress: %s", e)
             return False
 
+    async def _flush_progress(self, user_id: str) -> bool:
+        """Write the latest pending snapshot for a user after the coalesce window"""
+        await asyncio.sleep(WRITE_COALESCE_SECONDS)
+        try:
+            # Saves arriving during a write are picked up by the next iteration
+            while user_id in self._pending:
+                progress_data = self._pending.pop(user_id)
+                async with self.pool.acquire() as conn:
+                    await conn.execute(
+                        SAVE_PROGRESS_SQL, user_id, progress_data.model_dump()
+                    )
+            return True
+        except Exception:
+            self._pending.pop(user_id, None)
+            raise
+        finally:
+            del self._write_queue[user_id]
+
     async def load_progress(self, user_id: str) -> Optional[ProgressData]:
         """Load user progress from database"""
         try:
             if self.pool:
+                # Read-your-writes for a save still inside its coalesce window
+                if user_id in self._pending:
+                    return self._pending[user_id]
                 async with self.pool.acquire() as conn:
-                    row = await conn.fetchrow(
-                        """
-                        SELECT data FROM user_progress WHERE user_id = $1
-                        ORDER BY updated_at DESC LIMIT 1
-                    """,
-                        user_id,
-                    )
+                    row = await conn.fetchrow(LOAD_PROGRESS_SQL, user_id)
 
                     if row:
-                        return ProgressData(**row["data"])
+                        return ProgressData.model_validate(row["data"])
             else:
                 # File-based fallback
                 file_path = f"data/progress_{user_id}.json"
-                if os.path.exists(file_path):
-                    with open(file_path, "r") as f:
-                        data = json.load(f)
-                        return ProgressData(**data)
+                log_path = f"data/progress_{user_id}.log"
+                if os.path.exists(file_path) or os.path.exists(log_path):
+                    data = {}
+                    if os.path.exists(file_path):
+                        with open(file_path, "rb") as f:
+                            data = orjson.loads(f.read())
+                    progress = ProgressData.model_validate(data)
+
+                    # Replay completions logged since the last snapshot
+                    if os.path.exists(log_path):
+                        with open(log_path, "rb") as f:
+                            for line in f:
+                                try:
+                                    entry = orjson.loads(line)
+                                except orjson.JSONDecodeError:
+                                    continue  # Partially written last line
+                                _apply_completion(
+                                    progress,
+                                    TaskCompletion.model_validate(entry["completion"]),
+                                    entry["earned_xp"],
+                                    entry["cert_increase"],
+                                    entry["portfolio_item"],
+                                    entry["ts"],
+                                )
+                    return progress
+
+        except Exception as e:
+            logger.error("Failed to load progress: %s", e)
+
+        return None
+
+    async def load_summary(self, user_id: str) -> Optional[Dict[str, int]]:
+        """Load headline progress counts without fetching the full JSONB"""
+        try:
+            # A missing row means no progress yet; only an unflushed save or
+            # file storage goes through the full document instead
+            if self.pool and user_id not in self._pending:
+                async with self.pool.acquire() as conn:
+                    row = await conn.fetchrow(LOAD_SUMMARY_SQL, user_id)
+                    if row:
+                        return dict(row)
+            else:
+                progress = await self.load_progress(user_id)
+                if progress:
+                    return {
+                        "total_xp": progress.totalXP,
+                        "completed_n": len(progress.completedTasks),
+                        "struggled_n": len(progress.struggledTasks),
+                        "portfolio_n": len(progress.portfolioItems),
+                        "current_week": progress.currentWeek,
+                    }
 
         except Exception as e:
-            logger.error(f"Failed to load progress: {e}")
+            logger.error("Failed to load summary: %s", e)
 
         return None
 
+    async def apply_task_completion(
+        self,
+        user_id: str,
+        completion: TaskCompletion,
+        earned_xp: int,
+        cert_increase: int,
+        portfolio_item: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Tuple[int, int]]:
+        """Record a completed task, returning (xp_earned, total_xp)"""
+        timestamp = datetime.now().isoformat()
+        try:
+            if self.pool:
+                # Inserted as-is for new users, otherwise only the delta is merged
+                # into the stored JSONB in a single statement
+                initial = ProgressData()
+                _apply_completion(
+                    initial,
+                    completion,
+                    earned_xp,
+                    cert_increase,
+                    portfolio_item,
+                    timestamp,
+                )
+
+                # A queued full save must land first or it would overwrite this
+                flush = self._write_queue.get(user_id)
+                if flush is not None:
+                    await asyncio.shield(flush)
+
+                async with self.pool.acquire() as conn:
+                    total_xp = await conn.fetchval(
+                        APPLY_TASK_COMPLETION_SQL,
+                        user_id,
+                        initial.model_dump(),
+                        completion.taskId,
+                        earned_xp,
+                        cert_increase,
+                        [portfolio_item] if portfolio_item else [],
+                        (
+                            {completion.taskId: completion.notes}
+                            if completion.notes
+                            else {}
+                        ),
+                        timestamp,
+                    )
+                    if total_xp is not None:
+                        return earned_xp, total_xp
+
+                    # Task was already completed, nothing was written
+                    total_xp = await conn.fetchval(LOAD_TOTAL_XP_SQL, user_id)
+                    return 0, total_xp
+            else:
+                # File-based fallback
+                progress = await self.load_progress(user_id) or ProgressData()
+                if not _apply_completion(
+                    progress,
+                    completion,
+                    earned_xp,
+                    cert_increase,
+                    portfolio_item,
+                    timestamp,
+                ):
+                    return 0, progress.totalXP
+
+                # Append only the delta instead of rewriting the snapshot
+                os.makedirs("data", exist_ok=True)
+                entry = {
+                    "ts": timestamp,
+                    "completion": completion.model_dump(),
+                    "earned_xp": earned_xp,
+                    "cert_increase": cert_increase,
+                    "portfolio_item": portfolio_item,
+                }
+                with open(f"data/progress_{user_id}.log", "ab") as f:
+                    f.write(orjson.dumps(entry) + b"\n")
+                return earned_xp, progress.totalXP
+
+        except Exception as e:
+            logger.error("Failed to apply task completion: %s", e)
+            return None
+
     async def save_daily_log(self, user_id: str, daily_log: DailyLog) -> bool:
         """Save daily log entry"""
         try:
             if self.pool:
                 async with self.pool.acquire() as conn:
                     await conn.execute(
-                        """
-                        INSERT INTO daily_logs (user_id, date, data)
-                        VALUES ($1, $2, $3)
-                        ON CONFLICT (user_id, date) DO UPDATE SET
-                        data = $3
-                    """,
+                        SAVE_DAILY_LOG_SQL,
                         user_id,
-                        daily_log.date,
-                        json.dumps(daily_log.dict()),
+                        # asyncpg only accepts date objects for a DATE parameter
+                        date.fromisoformat(daily_log.date),
+                        daily_log.model_dump(),
                     )
                     return True
             else:
                 # File-based fallback
                 os.makedirs("data/logs", exist_ok=True)
-                with open(f"data/logs/{user_id}_{daily_log.date}.json", "w") as f:
-                    json.dump(daily_log.dict(), f, indent=2)
+                with open(f"data/logs/{user_id}_{daily_log.date}.json", "wb") as f:
+                    f.write(
+                        orjson.dumps(daily_log.model_dump(), option=orjson.OPT_INDENT_2)
+                    )
                 return True
 
         except Exception as e:
-            logger.error(f"Failed to save daily log: {e}")
+            logger.error("Failed to save daily log: %s", e)
             return False
 
     async def get_spaced_repetition_items(
@@ -192,7 +522,9 @@ class DatabaseManager:
                     )
 
                     return [
-                        SpacedRepetitionItem(taskId=row["task_id"], **row["data"])
+                        SpacedRepetitionItem.model_validate(
+                            {**row["data"], "taskId": row["task_id"]}
+                        )
                         for row in rows
                     ]
             else:
@@ -200,11 +532,35 @@ class DatabaseManager:
                 return []
 
         except Exception as e:
-            logger.error(f"Failed to get spaced repetition items: {e}")
+            logger.error("Failed to get spaced repetition items: %s", e)
             return []
 
+    async def compact_progress_logs(self, max_lines: int = LOG_COMPACTION_LINES) -> int:
+        """Fold long file-fallback completion logs into their snapshots"""
+        if self.pool or not os.path.isdir("data"):
+            return 0
+
+        compacted = 0
+        for name in os.listdir("data"):
+            if not (name.startswith("progress_") and name.endswith(".log")):
+                continue
+
+            with open(os.path.join("data", name), "rb") as f:
+                if sum(1 for _ in f) < max_lines:
+                    continue
+
+            user_id = name[len("progress_") : -len(".log")]
+            progress = await self.load_progress(user_id)
+            if progress and await self.save_progress(user_id, progress):
+                compacted += 1
+
+        return compacted
+
     async def close(self):
         """Close database connections"""
+        # Flush queued progress saves before the pool goes away
+        if self._write_queue:
+            await asyncio.gather(*self._write_queue.values(), return_exceptions=True)
         if self.pool:
             await self.pool.close()
 
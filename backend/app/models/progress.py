@@ -1,5 +1,5 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Set
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 # Database Models
@@ -23,6 +23,38 @@ class ProgressData(BaseModel):
     difficultyLevel: str = "medium"
     lastUpdated: Optional[str] = None
 
+    # Set mirrors of the task lists for O(1) membership checks
+    _completed_set: Set[str] = PrivateAttr(default_factory=set)
+    _struggled_set: Set[str] = PrivateAttr(default_factory=set)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._completed_set = set(self.completedTasks)
+        self._struggled_set = set(self.struggledTasks)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Keep the mirrors in sync when a task list is reassigned
+        if name == "completedTasks":
+            self._completed_set = set(value)
+        elif name == "struggledTasks":
+            self._struggled_set = set(value)
+
+    def add_completed(self, task_id: str) -> bool:
+        """Append a completed task once; False if it was already there"""
+        if task_id in self._completed_set:
+            return False
+        self._completed_set.add(task_id)
+        self.completedTasks.append(task_id)
+        return True
+
+    def add_struggled(self, task_id: str) -> bool:
+        """Append a struggled task once; False if it was already there"""
+        if task_id in self._struggled_set:
+            return False
+        self._struggled_set.add(task_id)
+        self.struggledTasks.append(task_id)
+        return True
+
 
 class TaskCompletion(BaseModel):
     taskId: str
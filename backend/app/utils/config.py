@@ -8,6 +8,11 @@ from dataclasses import dataclass
 from typing import List
 from dotenv import load_dotenv
 
+# Skip process/thread lookups on every LogRecord; no formatter uses them
+logging.logProcesses = False
+logging.logThreads = False
+logging.logMultiprocessing = False
+
 
 @dataclass
 class EnvironmentConfig:
@@ -25,6 +30,7 @@ class APIConfig:
     port: int
     debug: bool
     cors_origins: List[str]
+    workers: int
 
 
 @dataclass
@@ -84,13 +90,14 @@ class Config:
             port=int(os.getenv("PORT", "8000")),
             debug=os.getenv("API_DEBUG", "false").lower() == "true",
             cors_origins=[origin.strip() for origin in cors_origins.split(",")],
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
         )
 
         # Database Configuration
         self.database = DatabaseConfig(
             url=os.getenv("DATABASE_URL", "sqlite:///progress.db"),
-            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
-            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "15")),
         )
 
         # Progress Tracking Configuration
@@ -117,14 +124,26 @@ class Config:
 
     def _setup_logging(self):
         """Configure logging"""
-        log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+        log_level = getattr(
+            logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO
+        )
+
+        # Source locations are only worth their per-record cost when debugging
+        with_source = self.env.name == "development" and log_level <= logging.DEBUG
+        if not with_source:
+            # Documented logging optimization: skips the sys._getframe() walk
+            logging._srcfile = None
 
         logging.basicConfig(
-            level=getattr(logging, log_level, logging.INFO),
+            level=log_level,
             format=(
                 "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s"
-                if self.env.name == "development"
-                else "%(asctime)s - %(levelname)s - %(message)s"
+                if with_source
+                else (
+                    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+                    if self.env.name == "development"
+                    else "%(asctime)s - %(levelname)s - %(message)s"
+                )
             ),
         )
 
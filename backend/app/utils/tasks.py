@@ -1,25 +1,63 @@
+import asyncio
 from datetime import datetime, timedelta
 from app.models.database import db_manager
-from app.utils.config import get_logger
+from app.utils.config import get_config, get_logger
 
 logger = get_logger(__name__)  # Module-specific logger
 
+# Advisory lock key shared by all workers so only one runs the cleanup
+CLEANUP_LOCK_ID = 8675309
 
-# Background task for data cleanup
-async def cleanup_old_data():
-    """Background task to clean up old data"""
+# Rows deleted per statement, keeping each lock window and WAL burst short
+CLEANUP_BATCH_SIZE = 1000
+
+
+async def _cleanup_once():
+    """Delete stale data if no other worker is already doing so"""
     try:
         # Clean up old spaced repetition items (older than 30 days)
         cutoff_date = datetime.now() - timedelta(days=30)
         if db_manager.pool:
             async with db_manager.pool.acquire() as conn:
-                await conn.execute(
-                    """
-                    DELETE FROM spaced_repetition 
-                    WHERE next_review < $1
-                """,
-                    cutoff_date,
-                )
+                if not await conn.fetchval(
+                    "SELECT pg_try_advisory_lock($1)", CLEANUP_LOCK_ID
+                ):
+                    logger.info("Data cleanup already running in another worker")
+                    return
+
+                try:
+                    while True:
+                        status = await conn.execute(
+                            """
+                            DELETE FROM spaced_repetition
+                            WHERE ctid = ANY(ARRAY(
+                                SELECT ctid FROM spaced_repetition
+                                WHERE next_review < $1
+                                ORDER BY next_review
+                                LIMIT $2
+                            ))
+                        """,
+                            cutoff_date,
+                            CLEANUP_BATCH_SIZE,
+                        )
+                        # Status is "DELETE <count>"; a short batch was the last
+                        if int(status.split()[-1]) < CLEANUP_BATCH_SIZE:
+                            break
+                finally:
+                    await conn.execute("SELECT pg_advisory_unlock($1)", CLEANUP_LOCK_ID)
+        else:
+            compacted = await db_manager.compact_progress_logs()
+            if compacted:
+                logger.info("Compacted %d progress logs", compacted)
         logger.info("Completed data cleanup")
     except Exception as e:
-        logger.error(f"Data cleanup failed: {e}")
+        logger.error("Data cleanup failed: %s", e)
+
+
+# Background task for data cleanup
+async def cleanup_old_data():
+    """Background task to clean up old data, repeated every backup interval"""
+    interval = get_config().progress.backup_interval_hours * 3600
+    while True:
+        await _cleanup_once()
+        await asyncio.sleep(interval)